@@ -1,16 +1,21 @@
 """Quick validation script for gold vs A-share ETF rotation."""
 
+import hashlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import pandas as pd
+from joblib import Memory
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
 	sys.path.append(str(ROOT))
 
 from src.data_fetcher import (
+	DATA_DIR,
 	fetch_a_share_index_or_etf,
 	fetch_gold_futures,
 	save_data,
@@ -18,6 +23,38 @@ from src.data_fetcher import (
 from strategies.rotation_strategy import RotationConfig, generate_signals, performance_summary
 from adapters.variety_adapter import DummyAdapter
 
+_memory = Memory(DATA_DIR / "joblib", verbose=0)
+
+
+def _strategy_fingerprint() -> str:
+	"""Hash the strategy sources so edits to them invalidate cached results."""
+
+	digest = hashlib.sha256()
+	for path in sorted((ROOT / "strategies").glob("*.py")):
+		digest.update(path.name.encode())
+		digest.update(path.read_bytes())
+	return digest.hexdigest()
+
+
+@_memory.cache
+def _compute(
+	gold: pd.DataFrame, equity: pd.DataFrame, cfg_fields: Tuple, strategy_fingerprint: str
+) -> Tuple[pd.DataFrame, dict]:
+	"""Run signals, equity curve and metrics for one parameter set.
+
+	strategy_fingerprint is unused in the body; joblib only fingerprints _compute
+	itself, so it keys the cache on the strategy code it calls into.
+	"""
+
+	cfg = RotationConfig(*cfg_fields)
+	result = generate_signals(gold, equity, config=cfg)
+
+	curve = (1 + result["portfolio_ret"]).cumprod()
+	metrics = performance_summary(result["portfolio_ret"])
+
+	output = pd.concat([result, curve.rename("portfolio_curve")], axis=1)
+	return output, metrics
+
 
 def run_validation(
 	equity_symbol: str = "510300",
@@ -27,19 +64,22 @@ def run_validation(
 	rebalance: str = "weekly",
 	fee_bps: float = 5.0,
 ):
-	gold = fetch_gold_futures(start_date=start_date, end_date=end_date)
-	equity = fetch_a_share_index_or_etf(symbol=equity_symbol, start_date=start_date, end_date=end_date)
+	# Both downloads are network-bound and independent, so run them concurrently.
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		gold_future = executor.submit(fetch_gold_futures, start_date=start_date, end_date=end_date)
+		equity_future = executor.submit(
+			fetch_a_share_index_or_etf,
+			symbol=equity_symbol,
+			start_date=start_date,
+			end_date=end_date,
+		)
+		gold, equity = gold_future.result(), equity_future.result()
 
 	cfg = RotationConfig(lookback_days=lookback_days, rebalance=rebalance, fee_bps=fee_bps)
-	result = generate_signals(gold, equity, config=cfg)
-
-	curve = (1 + result["portfolio_ret"]).cumprod()
-	metrics = performance_summary(result["portfolio_ret"])
-
-	output = pd.concat([result, curve.rename("portfolio_curve")], axis=1)
-	csv_path = save_data(output.reset_index(drop=True), f"backtest_{equity_symbol}.csv")
+	output, metrics = _compute(gold, equity, astuple(cfg), _strategy_fingerprint())
+	out_path = save_data(output.reset_index(drop=True), f"backtest_{equity_symbol}.parquet")
 
-	print(f"Saved backtest results to {csv_path}")
+	print(f"Saved backtest results to {out_path}")
 
 	# 中文输出：先结论，再细节
 	print("结论：")
@@ -4,20 +4,89 @@
 # 2. 获取A股指数或ETF历史数据 (使用 akshare，例如 000001.SH 上证指数, 510300.SH 沪深300ETF)
 # 3. 统一返回 pandas DataFrame，列名：Date, Open, High, Low, Close, Volume
 # 4. 支持指定开始日期和结束日期
-# 5. 添加保存到 CSV 的函数，路径为 data/ 目录下
+# 5. 添加保存到 parquet/CSV 的函数，路径为 data/ 目录下
 # 6. 添加基本的错误处理和数据清洗
+# 7. 以 parquet 缓存（按 symbol + 复权方式 / 黄金数据源），覆盖请求区间时直接按日期切片，否则整段重新抓取
+# 8. 多标的并发抓取（fetch_many / fetch_many_with_gold）
 
+import re
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import akshare as ak
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
-GOLD_CACHE = DATA_DIR / "gold_gc_f.csv"
+GOLD_SYMBOL = "GC=F"
+GOLD_SOURCES = ("akshare", "stooq", "yahoo")  # in order of preference
+HTTP_TIMEOUT = 10
+_EXCHANGE_SUFFIX_RE = re.compile(r"\.(?:SH|SZ)$", re.IGNORECASE)
+_BARE_CODE_RE = re.compile(r"^\d{6}$")
+
+# Source column names (akshare / stooq / Yahoo) mapped to the standard layout.
+_RENAME_MAP = MappingProxyType(
+    {
+        "日期": "Date",
+        "date": "Date",
+        "开盘": "Open",
+        "open": "Open",
+        "最高": "High",
+        "high": "High",
+        "最低": "Low",
+        "low": "Low",
+        "收盘": "Close",
+        "close": "Close",
+        "结算价": "Close",
+        "成交量": "Volume",
+        "volume": "Volume",
+        "成交量(手)": "Volume",
+    }
+)
+
+# Parquet metadata key holding the "YYYY-MM-DD/YYYY-MM-DD" range a cache file was fetched for.
+_COVERAGE_KEY = b"covered_range"
+
+# Canonical schema of cleaned price frames; cached files are written in this layout.
+_PRICE_SCHEMA = {
+    "Date": "datetime64[ns]",
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "Volume": "float64",
+    "Symbol": "string",
+}
+
+
+@lru_cache(maxsize=None)
+def _get_session(retries: int = 3, backoff_seconds: float = 1.0) -> requests.Session:
+    """Return a pooled HTTP session with exponential-backoff retries.
+
+    Sessions are shared per (retries, backoff_seconds) so keep-alive connections
+    are reused across calls with the same retry policy.
+    """
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_seconds,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=4))
+    return session
 
 
 def _to_datetime(date_str: str) -> datetime:
@@ -32,27 +101,14 @@ def _clean_price_dataframe(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
     if df.empty:
         raise ValueError(f"No data returned for symbol {symbol}")
 
-    df = df.rename(
-        columns={
-            "日期": "Date",
-            "date": "Date",
-            "开盘": "Open",
-            "open": "Open",
-            "最高": "High",
-            "high": "High",
-            "最低": "Low",
-            "low": "Low",
-            "收盘": "Close",
-            "close": "Close",
-            "结算价": "Close",
-            "成交量": "Volume",
-            "volume": "Volume",
-            "成交量(手)": "Volume",
-        }
-    )
+    df = df.rename(columns=_RENAME_MAP)
 
     # Normalize to date (naive) to reduce timezone drift across sources.
-    df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None).dt.normalize()
+    dates = pd.to_datetime(df["Date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    # Casting to day precision floors to midnight in one pass.
+    df["Date"] = dates.to_numpy().astype("datetime64[D]").astype("datetime64[ns]")
     if "Volume" not in df.columns:
         df["Volume"] = 0
 
@@ -67,7 +123,7 @@ def _clean_price_dataframe(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
     ].apply(pd.to_numeric, errors="coerce")
     df = df.dropna(subset=["Open", "High", "Low", "Close"]).sort_values("Date")
     df["Symbol"] = symbol
-    return df.reset_index(drop=True)
+    return df.astype(_PRICE_SCHEMA).reset_index(drop=True)
 
 
 def _filter_date_range(df: pd.DataFrame, start: datetime, end: Optional[datetime]) -> pd.DataFrame:
@@ -75,6 +131,95 @@ def _filter_date_range(df: pd.DataFrame, start: datetime, end: Optional[datetime
     return df.loc[mask].reset_index(drop=True)
 
 
+def _today() -> datetime:
+    return datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _cache_path(name: str) -> Path:
+    return DATA_DIR / f"{name}.parquet"
+
+
+def _cached_coverage(path: Path) -> Optional[Tuple[datetime, datetime]]:
+    """Return the date range a cache file was fetched for, from its metadata only."""
+
+    raw = (pq.read_schema(path).metadata or {}).get(_COVERAGE_KEY)
+    if raw is None:  # written before coverage was tracked; treat as a miss
+        return None
+    covered_start, covered_end = raw.decode().split("/")
+    return _to_datetime(covered_start), _to_datetime(covered_end)
+
+
+def _read_cached(path: Path) -> pd.DataFrame:
+    """Read an already-cleaned cache file; no re-cleaning is needed."""
+
+    return pd.read_parquet(path, columns=list(_PRICE_SCHEMA))
+
+
+def _write_cached(
+    path: Path, df: pd.DataFrame, covered_start: datetime, covered_end: datetime
+) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    coverage = f"{covered_start:%Y-%m-%d}/{covered_end:%Y-%m-%d}".encode()
+    metadata = {**(table.schema.metadata or {}), _COVERAGE_KEY: coverage}
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+
+
+def _cached_fetch(
+    cache_names: Sequence[str],
+    start: datetime,
+    end: Optional[datetime],
+    fetch_fn: Callable[[datetime, Optional[datetime]], Tuple[str, pd.DataFrame]],
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """Serve a date slice from the parquet cache, refetching on a miss.
+
+    Each cache file records the date range it was fetched for and only answers when
+    that range covers ``start`` through ``end`` (today when open-ended), so open-ended
+    requests pick up new bars daily. ``cache_names`` lists the files that may answer,
+    in order of preference; ``fetch_fn(start, end)`` returns the name of the file its
+    frame belongs to together with the frame.
+
+    On a miss the union of the requested and previously covered ranges is refetched
+    and overwrites the file. Rows are never spliced onto an older snapshot, which
+    would mix qfq adjustment bases or gold data sources. If the refetch fails, the
+    first existing cache file with rows in the requested range is served instead
+    (e.g. stale data on a rate-limited day); the error is re-raised otherwise.
+    """
+
+    if not use_cache:
+        return fetch_fn(start, end)[1]
+
+    wanted_end = end or _today()
+    fetch_start, fetch_end = start, end
+    for name in cache_names:
+        path = _cache_path(name)
+        coverage = _cached_coverage(path) if path.exists() else None
+        if coverage is None:
+            continue
+        covered_start, covered_end = coverage
+        if covered_start <= start and covered_end >= wanted_end:
+            return _filter_date_range(_read_cached(path), start, end)
+        fetch_start = min(fetch_start, covered_start)
+        if fetch_end is not None:
+            fetch_end = max(fetch_end, covered_end)
+
+    try:
+        name, fresh = fetch_fn(fetch_start, fetch_end)
+    except Exception:
+        for name in cache_names:
+            path = _cache_path(name)
+            if not path.exists():
+                continue
+            cached_slice = _filter_date_range(_read_cached(path), start, end)
+            if not cached_slice.empty:
+                return cached_slice
+        raise
+
+    _write_cached(_cache_path(name), fresh, fetch_start, fetch_end or _today())
+    return _filter_date_range(fresh, start, end)
+
+
 def _fetch_gold_from_akshare(start: datetime, end: Optional[datetime]) -> Optional[pd.DataFrame]:
     if not hasattr(ak, "futures_foreign_commodity_hist"):
         return None
@@ -108,10 +253,14 @@ def _fetch_gold_from_akshare(start: datetime, end: Optional[datetime]) -> Option
     return None
 
 
-def _fetch_gold_from_stooq(start: datetime, end: Optional[datetime]) -> Optional[pd.DataFrame]:
+def _fetch_gold_from_stooq(
+    start: datetime, end: Optional[datetime], session: requests.Session
+) -> Optional[pd.DataFrame]:
     try:
         url = "https://stooq.com/q/d/l/?s=xauusd&i=d"
-        raw = pd.read_csv(url)
+        resp = session.get(url, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+        raw = pa_csv.read_csv(BytesIO(resp.content)).to_pandas()
         if raw is None or raw.empty:
             return None
         cleaned = _clean_price_dataframe(raw, symbol="XAUUSD")
@@ -121,89 +270,129 @@ def _fetch_gold_from_stooq(start: datetime, end: Optional[datetime]) -> Optional
         return None
 
 
-def fetch_gold_futures(
-    start_date: str,
-    end_date: Optional[str] = None,
-    retries: int = 3,
-    backoff_seconds: int = 5,
-    use_cache: bool = True,
-) -> pd.DataFrame:
-    """Fetch COMEX gold futures with akshare first, fallback to stooq/Yahoo."""
+def fetch_yahoo_bulk(
+    tickers: List[str], start: datetime, end: Optional[datetime] = None
+) -> Dict[str, pd.DataFrame]:
+    """Download several Yahoo Finance tickers in one request, cleaned per ticker.
 
-    start = _to_datetime(start_date)
-    end = _to_datetime(end_date) if end_date else None
+    Tickers that come back missing or with no rows are omitted from the result
+    rather than failing the whole batch; callers check membership.
+    """
+
+    raw = yf.download(
+        " ".join(tickers),
+        start=start,
+        end=end,
+        group_by="ticker",
+        progress=False,
+        auto_adjust=False,
+        threads=True,
+    )
+    if raw is None or raw.empty:
+        return {}
+
+    is_grouped = isinstance(raw.columns, pd.MultiIndex)
+    available = set(raw.columns.get_level_values(0)) if is_grouped else set()
+    result = {}
+    for ticker in tickers:
+        if is_grouped and ticker in available:
+            frame = raw[ticker]
+        elif not is_grouped and len(tickers) == 1:
+            frame = raw
+        else:
+            continue
+        frame = frame.dropna(how="all").rename_axis(columns=None)
+        if frame.empty:
+            continue
+        if "Adj Close" in frame.columns:
+            frame = frame.drop(columns="Close").rename(columns={"Adj Close": "Close"})
+        result[ticker] = _clean_price_dataframe(frame.reset_index(), symbol=ticker)
+    return result
+
+
+def _gold_cache_name(source: str) -> str:
+    return f"{GOLD_SYMBOL}_{source}"
 
-    if use_cache and GOLD_CACHE.exists():
-        cached = pd.read_csv(GOLD_CACHE, parse_dates=["Date"])
-        cached = _clean_price_dataframe(cached, symbol="GC=F")
-        cached_slice = _filter_date_range(cached, start, end)
-        if not cached_slice.empty:
-            return cached_slice.reset_index(drop=True)
+
+def _download_gold(
+    start: datetime,
+    end: Optional[datetime],
+    retries: int,
+    backoff_seconds: int,
+) -> Tuple[str, pd.DataFrame]:
+    """Return (cache name of the answering source, cleaned frame)."""
 
     # 1) Try akshare COMEX GC 合约
     ak_df = _fetch_gold_from_akshare(start, end)
     if ak_df is not None and not ak_df.empty:
-        if use_cache:
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            ak_df.to_csv(GOLD_CACHE, index=False)
-        return ak_df
+        return _gold_cache_name("akshare"), ak_df
 
     # 2) Try stooq spot gold (XAUUSD)
-    stooq_df = _fetch_gold_from_stooq(start, end)
+    stooq_df = _fetch_gold_from_stooq(start, end, _get_session(retries, backoff_seconds))
     if stooq_df is not None and not stooq_df.empty:
-        if use_cache:
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            stooq_df.to_csv(GOLD_CACHE, index=False)
-        return stooq_df
+        return _gold_cache_name("stooq"), stooq_df
 
-    # 2) Fallback to Yahoo Finance with retry/backoff
+    # 3) Fallback to Yahoo Finance with exponential backoff. yfinance manages its own
+    # curl_cffi session and rejects requests.Session, so retries stay here.
     last_exc = None
     for attempt in range(1, retries + 1):
-        try:
-            data = yf.download(
-                "GC=F",
-                start=start,
-                end=end,
-                progress=False,
-                auto_adjust=False,
-            )
-        except Exception as exc:  # yfinance raises YFRateLimitError on throttling
+        try:  # yfinance raises YFRateLimitError on throttling
+            frames = fetch_yahoo_bulk([GOLD_SYMBOL], start, end)
+        except Exception as exc:
             last_exc = exc
-            data = pd.DataFrame()
-
-        if not data.empty:
-            break
+        else:
+            if GOLD_SYMBOL in frames:
+                return _gold_cache_name("yahoo"), frames[GOLD_SYMBOL]
 
         if attempt < retries:
-            time.sleep(backoff_seconds * attempt)
-
-    if data.empty:
-        if use_cache and GOLD_CACHE.exists():
-            cached = pd.read_csv(GOLD_CACHE, parse_dates=["Date"])
-            cached = _clean_price_dataframe(cached, symbol="GC=F")
-            mask = (cached["Date"] >= start) & ((cached["Date"] <= end) if end else True)
-            cached_slice = cached.loc[mask]
-            if not cached_slice.empty:
-                return cached_slice.reset_index(drop=True)
+            time.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+    msg = "Failed to download GC=F from Yahoo Finance; likely rate limited."
+    if last_exc:
+        msg += f" Last error: {last_exc}"
+    raise RuntimeError(msg)
+
+
+def fetch_gold_futures(
+    start_date: str,
+    end_date: Optional[str] = None,
+    retries: int = 3,
+    backoff_seconds: int = 5,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """Fetch COMEX gold futures with akshare first, fallback to stooq/Yahoo.
+
+    retries / backoff_seconds drive both the urllib3 retry policy of the stooq
+    request and the Yahoo retry loop. Each source caches to its own file, so a
+    returned frame never mixes sources.
+    """
+
+    start = _to_datetime(start_date)
+    end = _to_datetime(end_date) if end_date else None
 
-        msg = "Failed to download GC=F from Yahoo Finance; likely rate limited."
-        if last_exc:
-            msg += f" Last error: {last_exc}"
-        raise RuntimeError(msg)
+    return _cached_fetch(
+        [_gold_cache_name(source) for source in GOLD_SOURCES],
+        start,
+        end,
+        lambda fetch_start, fetch_end: _download_gold(
+            fetch_start, fetch_end, retries, backoff_seconds
+        ),
+        use_cache=use_cache,
+    )
 
-    data = data.reset_index().rename(columns={"Adj Close": "Close"})
-    data = data[["Date", "Open", "High", "Low", "Close", "Volume"]]
-    cleaned = _clean_price_dataframe(data, symbol="GC=F")
 
-    if use_cache:
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        cleaned.to_csv(GOLD_CACHE, index=False)
+def _normalize_code(symbol: str) -> str:
+    """Strip an optional .SH/.SZ suffix, e.g. "510300.SH" -> "510300"."""
 
-    return cleaned
+    return symbol if _BARE_CODE_RE.match(symbol) else _EXCHANGE_SUFFIX_RE.sub("", symbol)
 
 
 def fetch_a_share_index_or_etf(
-    symbol: str, start_date: str, end_date: Optional[str] = None, is_etf: Optional[bool] = None
+    symbol: str,
+    start_date: str,
+    end_date: Optional[str] = None,
+    is_etf: Optional[bool] = None,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
     """Fetch A-share index or ETF using akshare.
 
@@ -212,39 +401,110 @@ def fetch_a_share_index_or_etf(
         start_date: YYYY-MM-DD
         end_date: YYYY-MM-DD, defaults to today
         is_etf: force ETF mode when True, index mode when False, auto-detect when None
+        use_cache: serve from / write to the parquet cache under data/
     """
 
-    code = symbol.replace(".SH", "").replace(".SZ", "").replace(".sh", "").replace(".sz", "")
+    code = _normalize_code(symbol)
     start = _to_datetime(start_date)
-    end_dt = _to_datetime(end_date) if end_date else datetime.today()
-    start_str, end_str = start.strftime("%Y%m%d"), end_dt.strftime("%Y%m%d")
+    end = _to_datetime(end_date) if end_date else None
 
     if is_etf is None:
         is_etf = code.startswith(("5", "1"))
+    adjust = "qfq" if is_etf else ""
+    cache_name = f"{code}_{adjust}"
+
+    def _download(
+        fetch_start: datetime, fetch_end: Optional[datetime]
+    ) -> Tuple[str, pd.DataFrame]:
+        start_str = fetch_start.strftime("%Y%m%d")
+        end_str = (fetch_end or datetime.today()).strftime("%Y%m%d")
+        if is_etf:
+            raw = ak.fund_etf_hist_em(
+                symbol=code,
+                start_date=start_str,
+                end_date=end_str,
+                adjust=adjust,
+            )
+        else:
+            raw = ak.index_zh_a_hist(
+                symbol=code,
+                period="daily",
+                start_date=start_str,
+                end_date=end_str,
+                adjust=adjust,
+            )
+        return cache_name, _clean_price_dataframe(raw, symbol=code)
+
+    return _cached_fetch([cache_name], start, end, _download, use_cache=use_cache)
+
+
+def _submit_equities(
+    executor: ThreadPoolExecutor,
+    symbols: Iterable[str],
+    start_date: str,
+    end_date: Optional[str],
+) -> Dict[str, Future]:
+    """Submit one fetch per distinct code and map every input symbol onto it.
+
+    Aliases such as "510300" and "510300.SH" share a cache file, so fetching them
+    in separate workers would read and write the same parquet path concurrently.
+    """
+
+    by_code: Dict[str, Future] = {}
+    futures = {}
+    for symbol in symbols:
+        code = _normalize_code(symbol)
+        if code not in by_code:
+            by_code[code] = executor.submit(fetch_a_share_index_or_etf, code, start_date, end_date)
+        futures[symbol] = by_code[code]
+    return futures
+
+
+def fetch_many(
+    symbols: Iterable[str],
+    start_date: str,
+    end_date: Optional[str] = None,
+    max_workers: int = 8,
+) -> Dict[str, pd.DataFrame]:
+    """Fetch several A-share indices/ETFs concurrently, keyed by input symbol.
+
+    Aliases of the same code are fetched once and share one DataFrame.
+    """
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = _submit_equities(executor, symbols, start_date, end_date)
+        return {symbol: future.result() for symbol, future in futures.items()}
 
-    if is_etf:
-        raw = ak.fund_etf_hist_em(
-            symbol=code,
-            start_date=start_str,
-            end_date=end_str,
-            adjust="qfq",
-        )
-    else:
-        raw = ak.index_zh_a_hist(
-            symbol=code,
-            period="daily",
-            start_date=start_str,
-            end_date=end_str,
-            adjust="",
-        )
 
-    return _clean_price_dataframe(raw, symbol=code)
+def fetch_many_with_gold(
+    symbols: Iterable[str],
+    start_date: str,
+    end_date: Optional[str] = None,
+    max_workers: int = 8,
+) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Fetch gold futures alongside several A-share symbols in one thread pool."""
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        gold_future = executor.submit(fetch_gold_futures, start_date, end_date)
+        futures = _submit_equities(executor, symbols, start_date, end_date)
+        equities = {symbol: future.result() for symbol, future in futures.items()}
+        return gold_future.result(), equities
 
 
-def save_data(df: pd.DataFrame, filename: str) -> Path:
-    """Save dataframe to the data/ directory as CSV."""
+def save_data(df: pd.DataFrame, filename: str, fmt: str = "parquet") -> Path:
+    """Save dataframe to the data/ directory as parquet (default) or CSV.
+
+    For parquet the filename suffix is replaced with ``.parquet``; CSV is written
+    with pyarrow's C++ writer.
+    """
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     path = DATA_DIR / filename
-    df.to_csv(path, index=False)
-    return path
\ No newline at end of file
+    if fmt == "parquet":
+        path = path.with_suffix(".parquet")
+        df.to_parquet(path, index=False, compression="snappy")
+    elif fmt == "csv":
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return path
@@ -0,0 +1,80 @@
+"""Numba kernels backing the rotation strategy hot paths.
+
+Kernels compile at first call and are cached on disk (cache=True), so later
+interpreter sessions skip JIT. nogil lets them run from worker threads.
+"""
+
+import numpy as np
+from numba import njit
+
+CASH_CODE = 0
+GOLD_CODE = 1
+EQUITY_CODE = 2
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def rotate(gold_close, eq_close, gold_ret, eq_ret, lookback, fee_rate, is_reb):
+	"""Run momentum pick, T+1 execution and portfolio returns in a single pass.
+
+	gold_ret / eq_ret are the precomputed daily simple returns of the closes.
+	Returns (signal_codes, position_codes, portfolio_ret) where codes follow
+	CASH_CODE / GOLD_CODE / EQUITY_CODE.
+	"""
+
+	n = gold_close.shape[0]
+	signal_codes = np.empty(n, dtype=np.int8)
+	position_codes = np.empty(n, dtype=np.int8)
+	portfolio_ret = np.empty(n, dtype=np.float64)
+
+	current_signal = CASH_CODE
+	prev_signal = CASH_CODE
+	prev_position = CASH_CODE
+	for i in range(n):
+		if is_reb[i] and i >= lookback:
+			mom_gold = gold_close[i] / gold_close[i - lookback] - 1.0
+			mom_eq = eq_close[i] / eq_close[i - lookback] - 1.0
+			# Ties go to gold, matching idxmax picking the first column.
+			if mom_gold >= mom_eq:
+				current_signal = GOLD_CODE if mom_gold > 0.0 else CASH_CODE
+			else:
+				current_signal = EQUITY_CODE if mom_eq > 0.0 else CASH_CODE
+		signal_codes[i] = current_signal
+
+		# Decision at T close executes at T+1 to avoid look-ahead bias.
+		position = prev_signal
+		position_codes[i] = position
+		prev_signal = current_signal
+
+		ret = 0.0
+		if position == GOLD_CODE:
+			ret = gold_ret[i]
+		elif position == EQUITY_CODE:
+			ret = eq_ret[i]
+		if position != prev_position:
+			ret -= fee_rate
+		prev_position = position
+		portfolio_ret[i] = ret
+
+	return signal_codes, position_codes, portfolio_ret
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def drawdown_stats(returns):
+	"""Return (last_value, max_drawdown) of the compounded curve in one pass."""
+
+	n = returns.shape[0]
+	if n == 0:
+		return 1.0, 0.0
+
+	# Seed the peak with the first compounded value; fastmath rules out -inf sentinels.
+	cum = 1.0 + returns[0]
+	peak = cum
+	max_dd = 0.0
+	for i in range(1, n):
+		cum *= 1.0 + returns[i]
+		if cum > peak:
+			peak = cum
+		dd = cum / peak - 1.0
+		if dd < max_dd:
+			max_dd = dd
+	return cum, max_dd
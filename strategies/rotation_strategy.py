@@ -6,6 +6,8 @@ from typing import Literal, Optional
 import numpy as np
 import pandas as pd
 
+from strategies._numba_kernels import drawdown_stats, rotate
+
 Rebalance = Literal["daily", "weekly", "monthly"]
 
 
@@ -18,21 +20,49 @@ class RotationConfig:
 
 
 def _prepare_prices(gold: pd.DataFrame, equity: pd.DataFrame) -> pd.DataFrame:
-	gold_series = gold.set_index("Date")["Close"].rename("GOLD")
-	equity_series = equity.set_index("Date")["Close"].rename("EQUITY")
+	for name, frame in (("gold", gold), ("equity", equity)):
+		if not frame["Date"].is_unique:
+			raise ValueError(f"Duplicate dates in {name} prices; cannot align on Date")
+	gold_dates = gold["Date"].to_numpy(dtype="datetime64[ns]")
+	equity_dates = equity["Date"].to_numpy(dtype="datetime64[ns]")
 	# Align on overlapping trading days only to avoid holiday-induced forward fills.
-	prices = pd.concat([gold_series, equity_series], axis=1, join="inner").sort_index()
-	prices = prices.dropna()
-	return prices
+	common, gold_idx, equity_idx = np.intersect1d(
+		gold_dates, equity_dates, assume_unique=True, return_indices=True
+	)
+	closes = np.column_stack(
+		[
+			gold["Close"].to_numpy(dtype=np.float64)[gold_idx],
+			equity["Close"].to_numpy(dtype=np.float64)[equity_idx],
+		]
+	)
+	prices = pd.DataFrame(
+		closes,
+		index=pd.DatetimeIndex(common, name="Date"),
+		columns=["GOLD", "EQUITY"],
+	)
+	return prices.dropna()
+
+
+def _last_trading_days(index: pd.DatetimeIndex, freq: str) -> pd.DatetimeIndex:
+	"""Return the last trading day of each period in a sorted index."""
+
+	if index.empty:
+		return index
+	periods = index.to_period(freq).asi8
+	# The trailing period only counts once it is complete (reached its last business
+	# day); otherwise a mid-week run would re-pick on a day that later stops qualifying.
+	last_bday = pd.offsets.BDay().rollback(index[-1].to_period(freq).end_time.normalize())
+	is_last = np.append(periods[1:] != periods[:-1], index[-1] >= last_bday)
+	return index[is_last]
 
 
 def _rebalance_index(prices: pd.DataFrame, mode: Rebalance) -> pd.DatetimeIndex:
 	if mode == "daily":
 		return prices.index
 	if mode == "weekly":
-		return prices.resample("W-FRI").last().index
+		return _last_trading_days(prices.index, "W-FRI")
 	if mode == "monthly":
-		return prices.resample("M").last().index
+		return _last_trading_days(prices.index, "M")
 	raise ValueError(f"Unsupported rebalance mode: {mode}")
 
 
@@ -49,68 +79,66 @@ def generate_signals(
 
 	cfg = config or RotationConfig()
 	prices = _prepare_prices(gold, equity)
-	daily_ret = prices.pct_change().fillna(0.0)
+	# One contiguous row per asset: [gold, equity].
+	close = np.ascontiguousarray(prices.to_numpy(dtype=np.float64).T)
+	daily_ret = np.empty_like(close)
+	daily_ret[:, :1] = 0.0
+	# Divide straight into the output buffer so no full-length temporaries are allocated.
+	np.divide(close[:, 1:], close[:, :-1], out=daily_ret[:, 1:])
+	daily_ret[:, 1:] -= 1.0
+	gold_ret, equity_ret = daily_ret
 
-	momentum = prices.pct_change(cfg.lookback_days)
 	rebalance_dates = _rebalance_index(prices, cfg.rebalance)
-	momentum_reb = momentum.reindex(rebalance_dates).dropna()
-
-	pick = momentum_reb.idxmax(axis=1)
-	pick_df = pick.to_frame("position_raw")
-	pick_df.loc[
-		momentum_reb.max(axis=1) <= 0,
-		"position_raw",
-	] = cfg.cash_symbol
-
-	# Decision signal at T (using T close), execution at T+1 to avoid look-ahead bias.
-	signal_series = pick_df["position_raw"].reindex(daily_ret.index).ffill()
-	signal_series = signal_series.fillna(cfg.cash_symbol)
-
-	exec_position = signal_series.shift(1).fillna(cfg.cash_symbol)
-
-	turnover = (exec_position != exec_position.shift(1).fillna(cfg.cash_symbol)).astype(float)
-	fee = turnover * (cfg.fee_bps / 10000.0)
-
-	gold_ret = daily_ret["GOLD"].rename("gold_ret")
-	equity_ret = daily_ret["EQUITY"].rename("equity_ret")
-
-	alloc_gold = (exec_position == "GOLD").astype(float)
-	alloc_equity = (exec_position == "EQUITY").astype(float)
-
-	portfolio_ret = alloc_gold * gold_ret + alloc_equity * equity_ret
-	portfolio_ret = portfolio_ret - fee
+	is_reb = prices.index.isin(rebalance_dates)
+
+	signal_codes, position_codes, portfolio_ret = rotate(
+		close[0],
+		close[1],
+		gold_ret,
+		equity_ret,
+		cfg.lookback_days,
+		cfg.fee_bps / 10000.0,
+		is_reb,
+	)
 
+	# Codes index into [cash, gold, equity]; see strategies._numba_kernels.
+	categories = [cfg.cash_symbol, "GOLD", "EQUITY"]
 	return pd.DataFrame(
 		{
-			"signal": signal_series,
-			"position": exec_position,
+			"signal": pd.Categorical.from_codes(signal_codes, categories=categories),
+			"position": pd.Categorical.from_codes(position_codes, categories=categories),
 			"gold_ret": gold_ret,
 			"equity_ret": equity_ret,
 			"portfolio_ret": portfolio_ret,
-		}
+		},
+		index=prices.index,
 	)
 
 
-def performance_summary(returns: pd.Series) -> dict:
-	"""Compute simple performance metrics from daily returns."""
+def performance_summary(returns: pd.Series, risk_free_rate: float = 0.0) -> dict:
+	"""Compute simple performance metrics from daily returns.
+
+	risk_free_rate is annual; it is compounded down to a daily hurdle for Sharpe.
+	"""
 
 	if returns.empty:
 		return {}
 
-	daily_ret = returns
-	cum_curve = (1 + daily_ret).cumprod()
-	total_days = (cum_curve.index[-1] - cum_curve.index[0]).days
+	daily_ret = returns.to_numpy(dtype=np.float64)
+	last_value, max_dd = drawdown_stats(daily_ret)
+	total_days = (returns.index[-1] - returns.index[0]).days
 	years = total_days / 365.25 if total_days > 0 else 0
 
-	cagr = cum_curve.iloc[-1] ** (1 / years) - 1 if years > 0 else np.nan
-	vol = daily_ret.std() * np.sqrt(252)
-	sharpe = (daily_ret.mean() / daily_ret.std()) * np.sqrt(252) if daily_ret.std() != 0 else np.nan
-	dd = (cum_curve / cum_curve.cummax() - 1).min()
+	cagr = last_value ** (1 / years) - 1 if years > 0 else np.nan
+	std = daily_ret.std(ddof=1) if daily_ret.size > 1 else np.nan
+	vol = std * np.sqrt(252)
+	rf_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+	sharpe = ((daily_ret.mean() - rf_daily) / std) * np.sqrt(252) if std != 0 else np.nan
 
 	return {
 		"cagr": cagr,
 		"vol": vol,
 		"sharpe": sharpe,
-		"max_drawdown": dd,
-		"last_value": cum_curve.iloc[-1],
+		"max_drawdown": max_dd,
+		"last_value": last_value,
 	}